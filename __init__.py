@@ -13,10 +13,31 @@ import os
 import sys
 import venv
 import subprocess
+import threading
 import bpy
 import importlib
+import importlib.util
+import importlib.metadata
+import functools
+import hashlib
+import re
 from typing import Optional
 
+# packaging gives exact PEP 508 parsing of requirement lines; fall back to a
+# regex split when it isn't bundled with the interpreter
+try:
+    from packaging.requirements import Requirement
+except ImportError:
+    Requirement = None
+
+# Import pip's entry point once so pip commands can run in-process instead of
+# paying a full interpreter start per subprocess. Falls back to subprocess if
+# pip is not importable in Blender's bundled interpreter.
+try:
+    from pip._internal.cli.main import main as pip_main
+except ImportError:
+    pip_main = None
+
 # DEBUG setting to control print statements
 DEBUG = False  # Set to True for debugging (prints enabled), False to disable prints
 
@@ -29,6 +50,7 @@ def debug_print(*args, **kwargs):
 
 
 
+@functools.lru_cache(maxsize=None)
 def addon_script_path() -> str:
     """Return the path where the add-on script is located (addon directory)."""
     addon_path = os.path.dirname(__file__)  # Use __file__ to get the script directory
@@ -36,6 +58,7 @@ def addon_script_path() -> str:
     return addon_path
 
 
+@functools.lru_cache(maxsize=None)
 def venv_path(env_name="virtual_dependencies") -> str:
     """Define the path for the virtual environment directory in the add-on's folder."""
     addon_path = addon_script_path()
@@ -44,6 +67,7 @@ def venv_path(env_name="virtual_dependencies") -> str:
     return env_path
 
 
+@functools.lru_cache(maxsize=None)
 def python_exec() -> str:
     """Return the path to the Python executable in the virtual environment if it exists."""
     env_python = os.path.join(venv_path(), 'Scripts', 'python.exe') if os.name == 'nt' else os.path.join(venv_path(), 'bin', 'python')
@@ -51,48 +75,169 @@ def python_exec() -> str:
     return env_python if os.path.exists(env_python) else sys.executable
 
 
+# Warm-session flags so repeated UI clicks skip the exists/ensurepip work
+_venv_ready = False
+_pip_ensured = False
+
+
 def create_venv(env_name="virtual_dependencies"):
     """Create a virtual environment if it doesn't exist."""
+    global _venv_ready
+    if _venv_ready:
+        return
+
     env_dir = venv_path(env_name)
     if not os.path.exists(env_dir):
-        venv.create(env_dir, with_pip=True)
+        # Symlink the interpreter where the platform allows it instead of
+        # copying, reuse Blender's bundled site-packages, and let with_pip
+        # handle ensurepip so no follow-up subprocess is needed
+        builder = venv.EnvBuilder(
+            system_site_packages=True,
+            with_pip=True,
+            symlinks=(os.name != 'nt'),
+            upgrade_deps=False,
+        )
+        builder.create(env_dir)
+        # A pre-venv call may have cached the sys.executable fallback; drop it
+        # so the next lookup resolves (and re-caches) the venv interpreter
+        python_exec.cache_clear()
         debug_print(f"Virtual environment created at {env_dir}")
-        ensure_pip_installed()  # Ensure pip is available after environment creation
     else:
         debug_print("Virtual environment already exists.")
+    _venv_ready = True
 
 
 def ensure_pip_installed():
     """Ensure pip is installed in the virtual environment."""
+    global _pip_ensured
+    if _pip_ensured:
+        return
+
     python_exe = python_exec()
-    subprocess.run([python_exe, '-m', 'ensurepip'])
+    try:
+        subprocess.run([python_exe, '-m', 'ensurepip'], check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as error:
+        raise RuntimeError(error.stderr or f"ensurepip failed with exit code {error.returncode}")
+    _pip_ensured = True
     debug_print("Ensured that pip is installed.")
 
 
+def run_pip(args, env=None):
+    """Run a pip command in-process when pip is importable, otherwise in a subprocess.
+
+    Raises RuntimeError when pip reports a failure, so callers don't carry on
+    with a half-installed environment.
+    """
+    if pip_main is not None:
+        # Set the extra variables only for the duration of the pip call
+        # instead of leaking them into Blender's process environment
+        saved = {key: os.environ.get(key) for key in env} if env else {}
+        if env:
+            os.environ.update(env)
+        try:
+            status = pip_main(list(args))
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        if status != 0:
+            raise RuntimeError(f"pip {' '.join(args)} failed with exit code {status}")
+    else:
+        try:
+            subprocess.run(
+                [python_exec(), '-m', 'pip'] + list(args),
+                env={**os.environ, **env} if env else None,
+                check=True, capture_output=True, text=True,
+            )
+        except subprocess.CalledProcessError as error:
+            raise RuntimeError(error.stderr or f"pip {' '.join(args)} failed with exit code {error.returncode}")
+
+
+@functools.lru_cache(maxsize=None)
+def _pip_is_recent(minimum=(24, 0)) -> bool:
+    """Return True when the pip that runs installs is new enough to skip the self-upgrade."""
+    if pip_main is not None:
+        try:
+            version = importlib.metadata.version('pip')
+        except importlib.metadata.PackageNotFoundError:
+            return False
+    else:
+        # Subprocess fallback executes the venv's pip, so ask that one
+        result = subprocess.run([python_exec(), '-m', 'pip', '--version'], capture_output=True, text=True)
+        try:
+            version = result.stdout.split()[1]
+        except IndexError:
+            return False
+    try:
+        parts = tuple(int(part) for part in version.split('.')[:2])
+    except ValueError:
+        return False
+    return parts >= minimum
+
+
+def _requirements_hash() -> Optional[str]:
+    """Return the sha256 of requirements.txt, or None if the file is missing."""
+    requirements_txt = os.path.join(addon_script_path(), "requirements.txt")
+    if not os.path.exists(requirements_txt):
+        return None
+    with open(requirements_txt, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
 def install_packages(override: Optional[bool] = False):
     """Install or update packages from the requirements.txt file."""
     create_venv()  # Ensure the virtual environment exists before installation
-    
-    python_exe = python_exec()
+
     requirements_txt = os.path.join(addon_script_path(), "requirements.txt")
     target = venv_path()
-
-    # Ensure pip is installed
-    ensure_pip_installed()
-    
-    # Upgrade pip
-    subprocess.run([python_exe, '-m', 'pip', 'install', '--upgrade', 'pip'])
-
-    # Install dependencies with or without override
+    hash_file = os.path.join(target, '.installed_hash')
+    requirements_hash = _requirements_hash()
+
+    # Skip pip entirely when requirements.txt is unchanged since the last
+    # successful install and everything is still importable
+    if requirements_hash and not override and os.path.exists(hash_file):
+        with open(hash_file, 'r') as file:
+            installed_hash = file.read().strip()
+        if installed_hash == requirements_hash:
+            add_virtualenv_to_syspath()
+            if check_dependencies_installed():
+                debug_print("Requirements unchanged; skipping pip install.")
+                return
+
+    # On the subprocess fallback, upgrade the venv's pip (without --target, so
+    # the executing pip is actually replaced) when it is outdated. In-process
+    # pip is Blender's own and cannot be upgraded from here, so skip it there.
+    if pip_main is None and not _pip_is_recent():
+        run_pip(['install', '--no-input', '--disable-pip-version-check', '--upgrade', 'pip'])
+        # Re-probe next time so the freshly upgraded pip skips this path
+        _pip_is_recent.cache_clear()
+
+    # Install dependencies in a single pip invocation
+    # (pip is already ensured by create_venv, so no extra subprocess is needed)
+    command = ['install', '--no-input', '--disable-pip-version-check', '--prefer-binary', '--upgrade']
+    command += ['-r', requirements_txt, '--target', target]
     if override:
-        subprocess.run([python_exe, '-m', 'pip', 'install', '--upgrade', '--force-reinstall', '-r', requirements_txt, '--target', target])
-    else:
-        subprocess.run([python_exe, '-m', 'pip', 'install', '--upgrade', '-r', requirements_txt, '--target', target])
+        command.append('--force-reinstall')
+        # A fully pinned requirements file needs no dependency resolution on a
+        # forced reinstall — pip just fetches the listed wheels
+        requirements = read_requirements()
+        if requirements and all('==' in line for line in requirements):
+            command.append('--no-deps')
+    # Let pip download wheels concurrently instead of one at a time
+    run_pip(command, env={'PIP_PARALLEL_DOWNLOADS': '8'})
+
+    # Record the successful install so unchanged requirements can short-circuit
+    if requirements_hash:
+        with open(hash_file, 'w') as file:
+            file.write(requirements_hash)
 
     # Add the virtual environment’s directory to sys.path
     add_virtualenv_to_syspath()
 
-    # Check if all dependencies are installed
+    # Check if all dependencies are installed, bypassing any pre-install result
+    _dependencies_installed.cache_clear()
     check_dependencies_installed()
 
 
@@ -100,37 +245,99 @@ def add_virtualenv_to_syspath():
     """Add the virtual environment's directory to sys.path."""
     env_dir = venv_path()
 
-    # Add the virtual environment directory to sys.path for imports
-    if os.path.exists(env_dir):
-        sys.path.append(env_dir)
-        debug_print(f"Added virtual environment directory to sys.path: {env_dir}")
-    else:
+    # Add the virtual environment directory to sys.path for imports, but only
+    # once — repeated appends grow the path and slow down every import lookup
+    if not os.path.exists(env_dir):
         debug_print(f"Virtual environment directory not found at: {env_dir}")
+        return
 
+    if env_dir not in sys.path:
+        # Insert at the front so venv packages shadow Blender's bundled versions
+        sys.path.insert(0, env_dir)
+        importlib.invalidate_caches()
+        debug_print(f"Added virtual environment directory to sys.path: {env_dir}")
 
-def check_dependencies_installed() -> bool:
-    """Check if all the packages in the requirements.txt file are importable."""
+
+# Cached contents of requirements.txt, keyed by the file's mtime
+_requirements_cache = (None, ())
+
+
+def read_requirements() -> tuple:
+    """Return the non-empty, non-comment lines of requirements.txt as a tuple."""
+    global _requirements_cache
     requirements_txt = os.path.join(addon_script_path(), "requirements.txt")
-    
+
     if not os.path.exists(requirements_txt):
         debug_print(f"Requirements file '{requirements_txt}' not found.")
-        return False
+        return ()
+
+    mtime = os.stat(requirements_txt).st_mtime
+    if _requirements_cache[0] != mtime:
+        with open(requirements_txt, 'r') as file:
+            lines = tuple(
+                line.strip() for line in file.read().splitlines()
+                if line.strip() and not line.strip().startswith('#')
+            )
+        _requirements_cache = (mtime, lines)
+        debug_print(f"Read {len(lines)} requirements from {requirements_txt}")
+    return _requirements_cache[1]
+
+
+# Distributions whose import name differs from their PyPI name and which
+# importlib.metadata cannot resolve when the distribution is not yet installed
+_IMPORT_ALIASES = {
+    "pillow": "PIL",
+    "scikit-learn": "sklearn",
+    "scikit-image": "skimage",
+    "opencv-python": "cv2",
+    "pyyaml": "yaml",
+    "beautifulsoup4": "bs4",
+}
 
-    with open(requirements_txt, 'r') as file:
-        packages = file.readlines()
 
+@functools.lru_cache(maxsize=None)
+def requirement_name(line: str) -> str:
+    """Extract the distribution name from a requirement line like 'numpy>=1.26'."""
+    if Requirement is not None:
+        try:
+            return Requirement(line).name
+        except Exception:
+            pass
+    return re.split(r'[<>=!~;@\[\s]', line, 1)[0]
+
+
+@functools.lru_cache(maxsize=None)
+def import_name(line: str) -> str:
+    """Map a requirement line to the module name used to import it."""
+    dist_name = requirement_name(line)
+    normalized = dist_name.lower().replace('_', '-')
+    if normalized in _IMPORT_ALIASES:
+        return _IMPORT_ALIASES[normalized]
+    # Ask the installed-distribution metadata which top-level module the
+    # distribution provides (handles any other name mismatches)
+    for module, distributions in importlib.metadata.packages_distributions().items():
+        if normalized in (d.lower().replace('_', '-') for d in distributions):
+            return module
+    return dist_name.replace('-', '_')
+
+
+@functools.lru_cache(maxsize=None)
+def _dependencies_installed(mtime: float) -> bool:
+    """Check every package in the requirements file, cached per file mtime."""
     missing_packages = []
-    
-    # Check if each package is importable
-    for package in packages:
-        package_name = package.strip()
-        if package_name:  # Avoid empty lines
-            try:
-                importlib.import_module(package_name)
-                debug_print(f"Package '{package_name}' is already installed and importable.")
-            except ImportError:
-                missing_packages.append(package_name)
-                debug_print(f"Package '{package_name}' is missing or not importable.")
+
+    # Check if each package is locatable without executing its module code
+    for package_name in read_requirements():
+        module_name = import_name(package_name)
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None:
+            debug_print(f"Package '{package_name}' is already installed and importable.")
+        else:
+            missing_packages.append(package_name)
+            debug_print(f"Package '{package_name}' is missing or not importable.")
 
     if missing_packages:
         debug_print(f"Missing or non-importable packages: {', '.join(missing_packages)}")
@@ -138,26 +345,44 @@ def check_dependencies_installed() -> bool:
     return True
 
 
-def uninstall_packages():
-    """Uninstall all packages listed in the requirements.txt file."""
-    python_exe = python_exec()
+def check_dependencies_installed() -> bool:
+    """Check if all the packages in the requirements.txt file are importable."""
     requirements_txt = os.path.join(addon_script_path(), "requirements.txt")
 
     if not os.path.exists(requirements_txt):
-        debug_print("Requirements file not found for uninstallation.")
+        debug_print(f"Requirements file '{requirements_txt}' not found.")
+        return False
+
+    # The mtime key makes repeated checks O(1) until requirements.txt changes
+    return _dependencies_installed(os.stat(requirements_txt).st_mtime)
+
+
+def uninstall_packages():
+    """Uninstall all packages listed in the requirements.txt file."""
+    package_names = list(read_requirements())
+
+    if not package_names:
+        debug_print("No requirements found for uninstallation.")
         return
 
     # Ensure pip is installed before running uninstall
     ensure_pip_installed()
 
-    with open(requirements_txt, 'r') as file:
-        packages = file.readlines()
+    # Uninstall all packages in a single pip call, using the venv's own
+    # interpreter: in-process pip would act on Blender's environment, refusing
+    # the --target-installed packages while deleting Blender's bundled copies
+    try:
+        subprocess.run(
+            [python_exec(), '-m', 'pip', 'uninstall', '-y'] + package_names,
+            check=True, capture_output=True, text=True,
+        )
+    except subprocess.CalledProcessError as error:
+        raise RuntimeError(error.stderr or f"pip uninstall failed with exit code {error.returncode}")
 
-    for package in packages:
-        package_name = package.strip()
-        if package_name:  # Avoid empty lines
-            subprocess.run([python_exe, '-m', 'pip', 'uninstall', '-y', package_name])
-            debug_print(f"Uninstalled package: {package_name}")
+    # Uninstalling changes what's importable without touching requirements.txt,
+    # so the mtime-keyed check cache must be dropped
+    _dependencies_installed.cache_clear()
+    debug_print(f"Uninstalled packages: {', '.join(package_names)}")
 
 
 # Panel for Add-On Preferences
@@ -187,8 +412,44 @@ class InstallDependenciesOperator(bpy.types.Operator):
     bl_idname = "verv_req.install_dependencies"  # Updated the bl_idname here to match the class name
     bl_label = "Install Dependencies"
 
+    _timer = None
+    _worker = None
+    _error = None
+
+    def _install(self):
+        """Worker-thread body: run the install and stash any failure."""
+        try:
+            # Keep override off so unchanged requirements short-circuit pip;
+            # set it to True to force a full reinstall
+            install_packages(override=False)
+        except Exception as error:
+            # Catch everything: an uncaught exception would kill the thread
+            # silently and modal() would report success on a failed install
+            self._error = str(error)
+
     def execute(self, context):
-        install_packages(override=True)  # You can change `override` to `False` as needed
+        # Run pip on a worker thread so the multi-minute install doesn't
+        # freeze Blender's UI; modal() polls for completion
+        self._error = None
+        self._worker = threading.Thread(target=self._install, daemon=True)
+        self._worker.start()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.2, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        if self._worker.is_alive():
+            return {'RUNNING_MODAL'}
+
+        context.window_manager.event_timer_remove(self._timer)
+        if self._error:
+            self.report({'ERROR'}, self._error)
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Dependencies installed.")
         return {'FINISHED'}
 
 
@@ -197,7 +458,11 @@ class UninstallDependenciesOperator(bpy.types.Operator):
     bl_label = "Uninstall Dependencies"
 
     def execute(self, context):
-        uninstall_packages()
+        try:
+            uninstall_packages()
+        except RuntimeError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
         return {'FINISHED'}
 
 